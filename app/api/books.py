@@ -1,24 +1,112 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from typing import List
-from app.connection import get_db
-from app.models import Book
-from app.schemas import BookCreate, BookResponse, BookUpdate
+import base64
+import binascii
+from datetime import datetime
+import orjson
+from cachetools import TTLCache
+from fastapi import APIRouter, Body, HTTPException, Depends, Query, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import bindparam, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, List, Optional, Tuple
+from pydantic import TypeAdapter
+from app.connection import SessionLocal, get_db
+from app.models import Book
+from app.schemas import BookCreate, BookPage, BookResponse, BookUpdate
 from uuid import UUID
 
 router = APIRouter()
 
+# Process-local read caches. Entries hold BookResponse models rather than ORM objects so they
+# outlive the session that loaded them; writes invalidate them. For multi-worker deployments
+# these can be swapped for Redis using the same keys.
+_book_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+_list_cache: TTLCache = TTLCache(maxsize=1_000, ttl=5)
+
+# Bumped on every invalidation. Reads note it before querying and only fill a cache if it is unchanged
+# afterwards, so a write that commits while a read awaits the database can't be undone by that read
+# caching the pre-write row.
+_cache_generation = 0
+
+# The columns BookResponse is built from. Read paths select these as plain rows, skipping
+# ORM instance construction and identity-map bookkeeping.
+_BOOK_COLUMNS = (
+    Book.id,
+    Book.title,
+    Book.author,
+    Book.published_year,
+    Book.isbn,
+    Book.price,
+    Book.created_at,
+)
+
+# Hot statements built once at import and reused, so each request only binds parameters
+_BOOK_BY_ID_STMT = select(*_BOOK_COLUMNS).where(Book.id == bindparam("book_id"))
+_INSERT_BOOKS_STMT = insert(Book).on_conflict_do_nothing(index_elements=["isbn"]).returning(Book)
+
+# Postgres SQLSTATE for unique constraint violations
+_UNIQUE_VIOLATION = "23505"
+
+# Largest page list_books serves
+_MAX_PAGE_SIZE = 100
+
+# Rows per multi-row INSERT in create_books_bulk
+_BULK_INSERT_BATCH_SIZE = 1000
+
+# Largest payload POST /books/bulk accepts; it is validated, inserted and echoed back in one request
+_MAX_BULK_BOOKS = 10 * _BULK_INSERT_BATCH_SIZE
+
+# Serializer for list responses, compiled once instead of per request
+_BOOK_LIST_ADAPTER = TypeAdapter(List[BookResponse])
+
+
+def encode_cursor(book: BookResponse) -> str:
+    '''
+    Encodes the (created_at, id) position of a book into an opaque pagination cursor.
+    '''
+    raw = f"{book.created_at.isoformat()}|{book.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    '''
+    Decodes a cursor produced by encode_cursor back into (created_at, id).
+
+    Raises an HTTPException if the cursor is malformed.
+    '''
+    try:
+        created_at, book_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(book_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+
+def _invalidate_lists() -> None:
+    '''
+    Drops all cached list pages after books were added, changed or deleted.
+    '''
+    global _cache_generation
+    _cache_generation += 1
+    _list_cache.clear()
+
+def _invalidate_book(book_id: UUID) -> None:
+    '''
+    Drops a book and all cached list pages after the book was changed or deleted.
+    '''
+    _invalidate_lists()
+    _book_cache.pop(book_id, None)
+
+
 class BookService:
-    def __init__(self, db: Session) -> None:
+    def __init__(self, db: AsyncSession) -> None:
         self.db = db
 
-    def create_book(self, book: BookCreate) -> Book:
+    async def create_book(self, book: BookCreate) -> Book:
         '''
         Creates a new book in the database.
 
-        Checks if a book with the same ISBN already exists in the database. If so, raises an HTTPException.
-        Commits the new book to the database and handles integrity errors related to unique ISBN.
+        Inserts the book with INSERT ... ON CONFLICT DO NOTHING on the unique ISBN, so the
+        duplicate check and the insert happen in a single race-free statement. If a book with
+        the same ISBN already exists, no row is returned and an HTTPException is raised.
 
         Parameters:
             book (BookCreate): The book data to be added to the database.
@@ -26,57 +114,143 @@ class BookService:
         Returns:
             Book: The newly created book object.
         '''
-        existing_book = self.db.query(Book).filter(Book.isbn == book.isbn).first()
-        if existing_book:
+        stmt = (
+            insert(Book)
+            .values(**book.model_dump())
+            .on_conflict_do_nothing(index_elements=["isbn"])
+            .returning(Book)
+        )
+        result = await self.db.execute(stmt)
+        new_book = result.scalar_one_or_none()
+        if new_book is None:
+            await self.db.rollback()
             raise HTTPException(status_code=400, detail="Book with this ISBN already exists.")
-        
-        new_book = Book(**book.model_dump())
-        self.db.add(new_book)
-        try:
-            self.db.commit()
-            self.db.refresh(new_book)
-        except IntegrityError:
-            self.db.rollback()
-            raise HTTPException(status_code=400, detail="Failed to add book. ISBN must be unique.")
-        
+
+        await self.db.commit()
+        _invalidate_lists()
         return new_book
 
-    def list_books(self, skip: int = 0, limit: int = 10) -> List[Book]:
+    async def create_books_bulk(self, books: List[BookCreate]) -> List[Book]:
+        '''
+        Creates many books in the database in one transaction.
+
+        Books are inserted in batches of multi-row INSERT ... ON CONFLICT DO NOTHING statements
+        and committed once. Books whose ISBN already exists (or repeats within the payload)
+        are skipped rather than failing the whole request.
+
+        Parameters:
+            books (List[BookCreate]): The books to be added to the database.
+
+        Returns:
+            List[Book]: The newly created book objects.
         '''
-        Retrieves a list of books from the database with pagination.
+        created: List[Book] = []
+        for start in range(0, len(books), _BULK_INSERT_BATCH_SIZE):
+            batch = [book.model_dump() for book in books[start:start + _BULK_INSERT_BATCH_SIZE]]
+            result = await self.db.execute(_INSERT_BOOKS_STMT, batch)
+            created.extend(result.scalars().all())
+
+        if created:
+            await self.db.commit()
+            _invalidate_lists()
+        return created
+
+    async def list_books(
+        self,
+        after_id: Optional[UUID] = None,
+        after_created_at: Optional[datetime] = None,
+        limit: int = 10,
+        skip: Optional[int] = None,
+    ) -> List[BookResponse]:
+        '''
+        Retrieves a list of books from the database with keyset pagination.
+
+        Books are ordered by (created_at, id). When a cursor position is given, only books
+        strictly after it are returned, so the database seeks on the (created_at, id) index
+        instead of scanning and discarding skipped rows. Pages are cached for a few seconds.
 
         Parameters:
-            skip (int, optional): The number of books to skip for pagination. Defaults to 0.
+            after_id (UUID, optional): The ID of the last book of the previous page.
+            after_created_at (datetime, optional): The creation time of the last book of the previous page.
             limit (int, optional): The number of books to retrieve. Defaults to 10.
+            skip (int, optional): Deprecated. The number of books to skip (OFFSET pagination).
 
         Returns:
-            List[Book]: A list of books retrieved from the database.
+            List[BookResponse]: A list of books retrieved from the database.
+        '''
+        key = (after_id, after_created_at, limit, skip)
+        cached = _list_cache.get(key)
+        if cached is not None:
+            return cached
+
+        generation = _cache_generation
+        stmt = select(*_BOOK_COLUMNS).order_by(Book.created_at, Book.id)
+        if after_id is not None and after_created_at is not None:
+            stmt = stmt.where(tuple_(Book.created_at, Book.id) > tuple_(after_created_at, after_id))
+        elif skip:
+            stmt = stmt.offset(skip)
+        result = await self.db.execute(stmt.limit(limit))
+        books = [BookResponse.model_validate(row._mapping) for row in result]
+        if generation == _cache_generation:
+            _list_cache[key] = books
+        return books
+
+    async def iter_books(self, batch: int = 1000) -> AsyncIterator[BookResponse]:
+        '''
+        Streams every book in the database ordered by (created_at, id).
+
+        Rows are fetched from the database in batches, so memory stays bounded by the batch size
+        regardless of the table size.
+
+        Parameters:
+            batch (int, optional): The number of rows fetched per round trip. Defaults to 1000.
+
+        Yields:
+            BookResponse: The books, one at a time.
         '''
-        return self.db.query(Book).offset(skip).limit(limit).all()
+        stmt = (
+            select(*_BOOK_COLUMNS)
+            .order_by(Book.created_at, Book.id)
+            .execution_options(yield_per=batch)
+        )
+        result = await self.db.stream(stmt)
+        async for row in result:
+            yield BookResponse.model_validate(row._mapping)
 
-    def get_book(self, book_id: UUID) -> Book:
+    async def get_book(self, book_id: UUID) -> BookResponse:
         '''
         Retrieves a specific book from the database by its ID.
 
+        Serves the book from the cache when possible; otherwise loads it and caches it.
         If the book with the given ID does not exist, raises an HTTPException.
 
         Parameters:
             book_id (UUID): The ID of the book to retrieve.
 
         Returns:
-            Book: The book object retrieved from the database.
+            BookResponse: The book retrieved from the database.
         '''
-        book = self.db.query(Book).filter(Book.id == book_id).first()
-        if not book:
+        cached = _book_cache.get(book_id)
+        if cached is not None:
+            return cached
+
+        generation = _cache_generation
+        result = await self.db.execute(_BOOK_BY_ID_STMT, {"book_id": book_id})
+        row = result.first()
+        if not row:
             raise HTTPException(status_code=404, detail="Book not found")
-        return book
+        response = BookResponse.model_validate(row._mapping)
+        if generation == _cache_generation:
+            _book_cache[book_id] = response
+        return response
 
-    def update_book(self, book_id: UUID, book_data: BookUpdate) -> Book:
+    async def update_book(self, book_id: UUID, book_data: BookUpdate) -> Book:
         '''
         Updates the data of an existing book in the database.
 
         If the book with the given ID does not exist, raises an HTTPException.
-        Updates the book with the provided data and commits the changes.
+        If no fields are provided, or all of them already match the stored book, returns the book
+        without writing. Otherwise writes the fields with a single UPDATE ... RETURNING and commits.
 
         Parameters:
             book_id (UUID): The ID of the book to update.
@@ -85,18 +259,33 @@ class BookService:
         Returns:
             Book: The updated book object.
         '''
-        book = self.db.query(Book).filter(Book.id == book_id).first()
+        book = await self.db.get(Book, book_id)
         if not book:
             raise HTTPException(status_code=404, detail="Book not found")
-        
-        for key, value in book_data.model_dump(exclude_unset=True).items():
-            setattr(book, key, value)
 
-        self.db.commit()
-        self.db.refresh(book)
+        data = book_data.model_dump(exclude_unset=True)
+        if all(getattr(book, key) == value for key, value in data.items()):
+            return book
+
+        try:
+            result = await self.db.execute(
+                update(Book).where(Book.id == book_id).values(**data).returning(Book)
+            )
+        except IntegrityError as error:
+            await self.db.rollback()
+            if getattr(error.orig, "pgcode", None) != _UNIQUE_VIOLATION:
+                raise
+            raise HTTPException(status_code=400, detail="Failed to update book. ISBN must be unique.")
+
+        book = result.scalar_one_or_none()
+        if not book:  # Deleted concurrently since it was loaded
+            raise HTTPException(status_code=404, detail="Book not found")
+
+        await self.db.commit()
+        _invalidate_book(book_id)
         return book
 
-    def delete_book(self, book_id: UUID) -> None:
+    async def delete_book(self, book_id: UUID) -> None:
         '''
         Deletes a specific book from the database.
 
@@ -106,30 +295,63 @@ class BookService:
         Parameters:
             book_id (UUID): The ID of the book to delete.
         '''
-        book = self.db.query(Book).filter(Book.id == book_id).first()
+        book = await self.db.get(Book, book_id)
         if not book:
             raise HTTPException(status_code=404, detail="Book not found")
         
-        self.db.delete(book)
-        self.db.commit()
+        await self.db.delete(book)
+        await self.db.commit()
+        _invalidate_book(book_id)
 
 
 @router.post("/books/", response_model=BookResponse)
-def create_book(book: BookCreate, db: Session = Depends(get_db)) -> Book:
-    return BookService(db).create_book(book)
+async def create_book(book: BookCreate, db: AsyncSession = Depends(get_db)) -> Book:
+    return await BookService(db).create_book(book)
+
+@router.post("/books/bulk", response_model=List[BookResponse])
+async def create_books_bulk(
+    books: List[BookCreate] = Body(..., max_length=_MAX_BULK_BOOKS),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    created = await BookService(db).create_books_bulk(books)
+    content = _BOOK_LIST_ADAPTER.dump_json(_BOOK_LIST_ADAPTER.validate_python(created, from_attributes=True))
+    return Response(content, media_type="application/json")
+
+@router.get("/books/", response_model=BookPage)
+async def list_books(
+    cursor: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=_MAX_PAGE_SIZE),
+    skip: Optional[int] = Query(None, ge=0, deprecated=True, description="Use `cursor` instead."),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    after_created_at, after_id = decode_cursor(cursor) if cursor else (None, None)
+    books = await BookService(db).list_books(after_id, after_created_at, limit, skip)
+    next_cursor = encode_cursor(books[-1]) if len(books) == limit else None
+    # The items are already BookResponse models, so serialize directly instead of revalidating
+    page = BookPage.model_construct(items=books, next_cursor=next_cursor)
+    return Response(page.model_dump_json(), media_type="application/json")
+
+@router.get("/books/export")
+async def export_books() -> StreamingResponse:
+    # The stream outlives the request's get_db session, so it opens and closes its own
+    async def ndjson() -> AsyncIterator[bytes]:
+        async with SessionLocal() as db:
+            async for book in BookService(db).iter_books():
+                yield orjson.dumps(book.model_dump(mode="json")) + b"\n"
 
-@router.get("/books/", response_model=List[BookResponse])
-def list_books(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)) -> List[Book]:
-    return BookService(db).list_books(skip, limit)
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
 @router.get("/books/{book_id}", response_model=BookResponse)
-def get_book(book_id: UUID, db: Session = Depends(get_db)) -> Book:
-    return BookService(db).get_book(book_id)
+async def get_book(book_id: UUID, db: AsyncSession = Depends(get_db)) -> ORJSONResponse:
+    # BookResponse is already validated, so skip the response_model pass and let orjson encode it.
+    # mode="json" matters: asyncpg returns its own UUID subclass, which orjson refuses to serialize.
+    book = await BookService(db).get_book(book_id)
+    return ORJSONResponse(content=book.model_dump(mode="json"))
 
 @router.put("/books/{book_id}", response_model=BookResponse)
-def update_book(book_id: UUID, book_data: BookUpdate, db: Session = Depends(get_db)) -> Book:
-    return BookService(db).update_book(book_id, book_data)
+async def update_book(book_id: UUID, book_data: BookUpdate, db: AsyncSession = Depends(get_db)) -> Book:
+    return await BookService(db).update_book(book_id, book_data)
 
 @router.delete("/books/{book_id}", status_code=204)
-def delete_book(book_id: UUID, db: Session = Depends(get_db)) -> None:
-    BookService(db).delete_book(book_id)
+async def delete_book(book_id: UUID, db: AsyncSession = Depends(get_db)) -> None:
+    await BookService(db).delete_book(book_id)
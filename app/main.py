@@ -1,12 +1,70 @@
-from fastapi import FastAPI
+import logging
+import os
+from typing import Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
 from app.api import books
-from app.connection import engine
-from app.models import Base
+from app.connection import create_tables, engine
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# uvicorn configures only its own loggers, so log through its error logger to reach the server output
+logger = logging.getLogger("uvicorn.error")
 
-app = FastAPI()
+# orjson serializes UUID and datetime natively, without jsonable_encoder's Python-level walk
+app = FastAPI(default_response_class=ORJSONResponse)
+
+@app.on_event("startup")
+async def startup() -> None:
+    # Create database tables when DB_AUTOCREATE=1; otherwise the schema must already exist
+    await create_tables()
+    logger.info("Database connection pool: %s", engine.pool.status())
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    # Close pooled connections instead of leaving them to the garbage collector
+    await engine.dispose()
+
+if os.getenv("ENV") == "dev":
+    # Guard against N+1 queries in development: the same SELECT running many times in one request.
+    # Only SELECTs are counted, so batched writes such as /books/bulk's per-batch INSERTs never trip it.
+    # When relationships are added to Book, declare them with lazy="raise" and load them in
+    # BookService with selectinload/joinedload rather than touching them per row.
+    from collections import Counter
+    from contextvars import ContextVar
+    from sqlalchemy import event
+
+    MAX_REPEATED_SELECTS = int(os.getenv("MAX_REPEATED_SELECTS", "10"))
+    # Set NPLUSONE_RAISE=1 in tests/CI so regressions fail instead of only being logged
+    NPLUSONE_RAISE = os.getenv("NPLUSONE_RAISE", "").lower() in ("1", "true")
+
+    # A mutable counter, so statements run in the route's task are seen by the middleware
+    _select_counts: ContextVar[Optional[Counter]] = ContextVar("select_counts", default=None)
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_select(conn, cursor, statement, parameters, context, executemany) -> None:
+        counts = _select_counts.get()
+        if counts is not None and statement.lstrip()[:6].upper() == "SELECT":
+            counts[statement] += 1
+
+    @app.middleware("http")
+    async def detect_n_plus_one(request: Request, call_next):
+        counts: Counter = Counter()
+        token = _select_counts.set(counts)
+        try:
+            response = await call_next(request)
+        finally:
+            _select_counts.reset(token)
+
+        if counts:
+            statement, runs = counts.most_common(1)[0]
+            if runs > MAX_REPEATED_SELECTS:
+                message = (
+                    f"{request.method} {request.url.path} ran the same SELECT {runs} times "
+                    f"(limit {MAX_REPEATED_SELECTS}); possible N+1: {statement}"
+                )
+                if NPLUSONE_RAISE:
+                    raise RuntimeError(message)
+                logger.warning(message)
+        return response
 
 # Include the book routes
 app.include_router(books.router)
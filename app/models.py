@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Integer, Float, TIMESTAMP, func
+from sqlalchemy import BigInteger, Column, String, Integer, Float, TIMESTAMP, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import declarative_base
 
@@ -9,9 +9,23 @@ class Book(Base):
     __tablename__ = "books"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True, nullable=False)
-    title = Column(String, nullable=False)
-    author = Column(String, nullable=False)
+    # Bounded so ix_books_created_at_id entries, which INCLUDE both, stay under the btree row size limit
+    title = Column(String(255), nullable=False)
+    author = Column(String(255), nullable=False)
     published_year = Column(Integer, nullable=True)
-    isbn = Column(String(13), unique=True, nullable=False)  # ISBN should be 13 characters and unique
+    isbn = Column(BigInteger, nullable=False)  # ISBN-13 stored as an integer; unique (see ix_books_isbn_unique)
     price = Column(Float, nullable=False)
     created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_books_isbn_unique", "isbn", unique=True),
+        # Backs the keyset pagination in list_books (ORDER BY created_at, id). The remaining
+        # BookResponse columns are INCLUDEd so Postgres can answer list pages with an index-only scan.
+        Index(
+            "ix_books_created_at_id",
+            "created_at",
+            "id",
+            postgresql_include=["title", "author", "published_year", "isbn", "price"],
+        ),
+        Index("ix_books_author", "author"),
+    )
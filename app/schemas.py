@@ -1,29 +1,68 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, WithJsonSchema, field_serializer, field_validator
+from typing import Annotated, List, Optional
 import uuid
 from datetime import datetime
 
+# EAN-13 check digit weights for the first 12 digits
+_ISBN_WEIGHTS = (1, 3) * 6
+
+def parse_isbn(value: object) -> int:
+    '''
+    Parses an ISBN-13 given as a 13-digit string (or as its stored integer form) and validates its check digit.
+
+    Returns:
+        int: The ISBN as an integer, which is how it is stored in the database.
+    '''
+    digits = f"{value:013d}" if isinstance(value, int) else str(value)
+    if len(digits) != 13 or not digits.isdigit():
+        raise ValueError("ISBN must be exactly 13 digits.")
+    checksum = sum(int(digit) * weight for digit, weight in zip(digits, _ISBN_WEIGHTS))
+    if (10 - checksum % 10) % 10 != int(digits[12]):
+        raise ValueError("ISBN has an invalid check digit.")
+    return int(digits)
+
+# ISBN-13 accepted from clients: validated (including the check digit) and converted to its stored integer form.
+# Clients send it as a 13-digit string, so that is what the JSON schema publishes.
+ISBN = Annotated[int, BeforeValidator(parse_isbn), WithJsonSchema({"type": "string", "pattern": r"^\d{13}$"})]
+
 class BookBase(BaseModel):
-    title: str
-    author: str
+    title: str = Field(..., max_length=255)
+    author: str = Field(..., max_length=255)
     published_year: Optional[int] = None
-    isbn: str = Field(..., min_length=13, max_length=13, description="ISBN must be exactly 13 characters.")
+    isbn: ISBN = Field(..., description="ISBN-13 as a string of exactly 13 digits.")
     price: float
 
 class BookCreate(BookBase):
     pass
 
 class BookUpdate(BaseModel):
-    title: Optional[str] = None
-    author: Optional[str] = None
+    title: Optional[str] = Field(None, max_length=255)
+    author: Optional[str] = Field(None, max_length=255)
     published_year: Optional[int] = None
-    isbn: Optional[str] = Field(None, min_length=13, max_length=13, description="ISBN must be exactly 13 characters.")
+    isbn: Optional[ISBN] = Field(None, description="ISBN-13 as a string of exactly 13 digits.")
     price: Optional[float] = None
 
+    @field_validator("title", "author", "isbn", "price")
+    @classmethod
+    def reject_null(cls, value: object) -> object:
+        # Fields may be omitted, but these columns are NOT NULL, so an explicit null is invalid
+        if value is None:
+            raise ValueError("Field cannot be null.")
+        return value
+
 class BookResponse(BookBase):
     id: uuid.UUID
-    created_at: datetime  # Keep it as datetime but define json_encoders
+    # Read back from the database as-is: rows stored before check digits were validated must still load
+    isbn: int
+    created_at: datetime  # Serialized as an ISO 8601 string by Pydantic
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @field_serializer("isbn")
+    def serialize_isbn(self, isbn: int) -> str:
+        # Clients always see the ISBN in its 13-digit string form
+        return f"{isbn:013d}"
 
-    class Config:
-        from_orm = True
-        json_encoders = {datetime: lambda v: v.isoformat()}
+class BookPage(BaseModel):
+    items: List[BookResponse]
+    next_cursor: Optional[str] = None  # Opaque token to pass as `cursor` for the next page
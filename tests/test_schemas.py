@@ -0,0 +1,60 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from pydantic import ValidationError
+
+from app.schemas import BookCreate, BookResponse, parse_isbn
+
+
+def test_parse_isbn_accepts_valid_isbn():
+    assert parse_isbn("9780306406157") == 9780306406157
+
+
+def test_parse_isbn_accepts_stored_integer():
+    assert parse_isbn(9780306406157) == 9780306406157
+
+
+@pytest.mark.parametrize(
+    "value, message",
+    [
+        ("9780306406158", "invalid check digit"),
+        ("978030640615", "exactly 13 digits"),
+        ("97803064061570", "exactly 13 digits"),
+        ("978030640615X", "exactly 13 digits"),
+        (-1, "exactly 13 digits"),
+        (-9780306406157, "exactly 13 digits"),
+    ],
+)
+def test_parse_isbn_rejects_invalid_values(value, message):
+    with pytest.raises(ValueError, match=message):
+        parse_isbn(value)
+
+
+def test_book_create_rejects_bad_check_digit():
+    with pytest.raises(ValidationError):
+        BookCreate(title="Dune", author="Frank Herbert", isbn="9780306406158", price=9.99)
+
+
+def stored_book(isbn: int) -> BookResponse:
+    return BookResponse.model_validate({
+        "id": uuid.uuid4(),
+        "title": "Dune",
+        "author": "Frank Herbert",
+        "published_year": 1965,
+        "isbn": isbn,
+        "price": 9.99,
+        "created_at": datetime(2024, 1, 1),
+    })
+
+
+def test_leading_zero_isbn_round_trips():
+    isbn = BookCreate(title="Dune", author="Frank Herbert", isbn="0123456789012", price=9.99).isbn
+    assert isbn == 123456789012
+    assert stored_book(isbn).model_dump()["isbn"] == "0123456789012"
+    assert '"isbn":"0123456789012"' in stored_book(isbn).model_dump_json()
+
+
+def test_response_loads_legacy_isbn_with_bad_check_digit():
+    # Rows stored before check digits were validated must still be readable
+    assert stored_book(9780306406158).model_dump(mode="json")["isbn"] == "9780306406158"